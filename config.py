@@ -4,3 +4,6 @@ OPENROUTER_API_KEY = (
 
 #upload your google sheet creds
 GOOGLE_SHEETS_CREDENTIAL_PATH = "creds.json"
+
+#redis server holding the vocab sessions, shared by all uvicorn workers
+REDIS_URL = "redis://localhost:6379/0"
@@ -13,15 +13,69 @@ Functions include:
 Used throughout the system for all student-facing instructional messaging.
 """
 
-from openai import OpenAI
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import threading
+import re
+import unicodedata
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+import orjson
 import config
-import sheet_utils
+from whatsapp_utils import asend_whatsapp_message
+
+log = logging.getLogger(__name__)
+
+# Small model for the JSON classifiers, full-size model for teaching messages
+CLASSIFIER_MODEL = "google/gemma-3-4b-it"
+TEACHER_MODEL = "google/gemma-3-27b-it"
 
 client = OpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=config.OPENROUTER_API_KEY,
 )
 
+# Async client for every call made while handling a student's message, so a
+# reply being generated never holds a worker thread. Created once at import so
+# every call reuses the same keep-alive HTTP/2 pool.
+aclient = AsyncOpenAI(
+    base_url="https://openrouter.ai/api/v1",
+    api_key=config.OPENROUTER_API_KEY,
+    http_client=httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    ),
+)
+
+# Streamed replies are flushed to WhatsApp at these sentence boundaries,
+# or once the buffer grows past STREAM_FLUSH_LENGTH characters
+STREAM_FLUSH_CHARS = ("。", "！", "？", "\n")
+STREAM_FLUSH_LENGTH = 150
+
+# Output caps per kind of call; decode time grows with every generated token
+CLASSIFIER_MAX_TOKENS = 10  # Classifiers only ever reply with a tiny JSON object
+SHORT_REPLY_MAX_TOKENS = 120  # Greetings and one-line questions
+SHORT_REPLY_TEMPERATURE = 0.3
+TEACHING_MAX_TOKENS = 400  # Hints, explanations and other teaching messages
+
+# The fused answering/relevant classifier returns two labels
+CLASSIFY_REPLY_MAX_TOKENS = 20
+
+# Parallel classifier calls per batch_evaluate_answers() run (offline analytics only)
+BATCH_EVALUATE_WORKERS = 16
+
+# In-process LRU cache of classifier replies: { (function name, prompt hash): parsed reply }
+CLASSIFIER_CACHE_SIZE = 1000
+classifier_cache = OrderedDict()
+# batch_evaluate_answers() hits the cache from worker threads
+classifier_cache_lock = threading.Lock()
+
+# Greetings only depend on the student's name: { student_name: greeting }
+greeting_cache = {}
+
 # General system prompt for GrowTalk
 system_prompt_reading = f"""你是一位專為香港中學生設計的 AI 英文閱讀老師。你主要以廣東話教英文，只在需要提出英文閱讀問題、講解英文詞語、句式或例句時才用英文，並會用廣東話詳細解釋清楚。你的語言自然、親切，貼近香港學生的語境。
 
@@ -41,21 +95,11 @@ system_prompt_open = (
     f"""你是一位專為香港中學生設計的 AI 英文閱讀老師。你主要以廣東話教英文"""
 )
 
-system_prompt_vocab = f"""你是一位專為香港中學生設計的 AI 英文閱讀老師。你主要以廣東話教英文，只在需要提出英文閱讀問題、講解英文詞語、句式或例句時才用英文，並會用廣東話詳細解釋清楚。你的語言自然、親切，貼近香港學生的語境。
-
-你的教學是根據閱讀圈（reading circle）模式進行：學生先閱讀一段英文文本，然後你會根據文章內容逐步提出問題。問題可以是開放式（例如問主旨或角色動機），也可以是針對字詞、句子理解或語言技巧的。你透過問題判斷學生已懂與未懂的地方，並針對未懂之處提供適當的語言策略或理解技巧（例如用上下文揣摩生字意思、如何判斷語氣、分析句構）。
-
-當學生嘗試應用所學策略後，你會根據他們的回應判斷是否理解。如有需要，你會重新講解、舉例或改變方法，直到學生能理解和應用為止。
-
-在整個過程中，你會靈活運用 Talk Moves（例如重述學生講法、鼓勵補充、追問原因）和 Academic Productive Talk (APT) 策略，引導學生建構知識、澄清想法與深化理解。你會用問題促進對話，而不是直接提供答案。
-
-你不會長篇大論，每一句說話都經過思考，簡潔、有啟發性且自然。你像一位真正的老師，會觀察學生是否真正明白，並在適當時候作出提示或重構。你不會濫讚，只會在學生有具體表現（如嘗試推論、使用策略、清楚解釋）時給予具體回饋，例如：「你試下用上下文去估呢個字，好叻啊」、「你咁樣推斷角色，幾有道理，不過有冇漏咗第二段？」
-
-你善於舉例，但唔會死板用標準例子，如果覺得例子唔貼地、唔自然，可以主動改用香港學生熟悉的情境或經驗（例如校園生活、搭地鐵、玩手機、社交媒體、家庭情況等）。
+# Vocab sessions share the reading teacher persona
+system_prompt_vocab = system_prompt_reading
 
-你最終目標係幫學生建立英文閱讀理解能力、自主學習能力、同埋學習自信（academic self-efficacy）。你係一個會思考、會觀察、會引導的老師。
-
-"""
+# Minimal system prompt for the JSON classifiers, where the teaching persona is irrelevant
+system_prompt_classifier = "你係一個用JSON回覆嘅分類器。"
 
 """
 ##############
@@ -64,26 +108,201 @@ GENERAL
 """
 
 
-def greet_student(student_name: str) -> str:
+async def stream_and_send(
+    phone_number: int,
+    prompt: str,
+    system_prompt: str,
+    max_tokens: int = TEACHING_MAX_TOKENS,
+    section_delimiter: str = None,
+) -> str:
     """
-    Generate a warm and encouraging greeting message to student
+    Streams an LLM reply to the student, sending it sentence by sentence as it is generated.
 
-    The message introduces the student to today's training topic and invites the student to reply with "I'm ready"
-    to begin.
+    WhatsApp has no streaming support, so the tokens are buffered and flushed as a
+    separate message whenever a sentence boundary is reached or the buffer gets long.
 
     Parameters:
-        student_name (str): Student name
+        phone_number (int): Student's phone number.
+        prompt (str): The user prompt.
+        system_prompt (str): The system prompt.
+        max_tokens (int, optional): Output cap for the whole reply.
+        section_delimiter (str, optional): Marker the LLM places between sections;
+            it is never sent, and always ends the current message.
 
     Returns:
-        str: Cantonese greeting message generated by the LLM
+        str: The full reply, as it would have been returned without streaming.
     """
+    stream = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ],
+        stream=True,
+        max_tokens=max_tokens,
+    )
 
-    prompt = (
-        """請你向學生發出一個邀請，鼓勵佢哋參加今日嘅英語練習時間。
-        Student Name: {student_name}
+    full_reply = ""
+    buffer = ""
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content or ""
+        full_reply += delta
+        buffer += delta
+
+        if section_delimiter and section_delimiter in buffer:
+            section, buffer = buffer.split(section_delimiter, 1)
+            if section.strip():
+                await asend_whatsapp_message(phone_number, section.strip())
+
+        # Flush everything up to the last sentence boundary in the buffer
+        boundary = max(buffer.rfind(char) for char in STREAM_FLUSH_CHARS)
+        if boundary == -1 and len(buffer) > STREAM_FLUSH_LENGTH:
+            # Hold back what could be the start of a split delimiter, and cut at
+            # the last space when there is one
+            limit = len(buffer)
+            if section_delimiter:
+                limit -= len(section_delimiter) - 1
+            boundary = buffer.rfind(" ", 0, limit)
+            if boundary <= 0:
+                boundary = limit - 1
+        if boundary != -1:
+            if buffer[: boundary + 1].strip():
+                await asend_whatsapp_message(
+                    phone_number, buffer[: boundary + 1].strip()
+                )
+            buffer = buffer[boundary + 1 :]
+
+    if buffer.strip():
+        await asend_whatsapp_message(phone_number, buffer.strip())
+
+    return full_reply.strip()
+
+
+def _classifier_cache_key(name: str, prompt: str) -> tuple:
+    return (name, hashlib.blake2b(prompt.encode()).hexdigest())
+
+
+def _classifier_cache_get(key: tuple) -> dict | None:
+    with classifier_cache_lock:
+        result = classifier_cache.get(key)
+        if result is not None:
+            classifier_cache.move_to_end(key)
+        return result
+
+
+def _classifier_cache_put(key: tuple, result: dict) -> None:
+    with classifier_cache_lock:
+        classifier_cache[key] = result
+        classifier_cache.move_to_end(key)
+        if len(classifier_cache) > CLASSIFIER_CACHE_SIZE:
+            classifier_cache.popitem(last=False)
+
+
+def _boolean_schema_format(name: str, *keys: str) -> dict:
+    """
+    Builds a strict JSON-schema response_format for a classifier that replies with
+    one boolean per key, e.g. {"answered": true}.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {key: {"type": "boolean"} for key in keys},
+                "required": list(keys),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def _parse_boolean_reply(reply: str, *keys: str) -> dict:
+    result = orjson.loads(reply.encode())
+    if not isinstance(result, dict) or any(key not in result for key in keys):
+        raise ValueError(f"Unexpected LLM response: {reply}")
+    return {key: result[key] is True for key in keys}
+
+
+def _schema_keys(response_format: dict) -> list:
+    return response_format["json_schema"]["schema"]["required"]
+
+
+def _classifier_reply(
+    name: str,
+    prompt: str,
+    system_prompt: str,
+    response_format: dict,
+    max_tokens: int = CLASSIFIER_MAX_TOKENS,
+) -> dict:
+    """
+    Returns the parsed labels for a classifier prompt, skipping the call when the
+    same prompt has been classified before.
+
+    Only replies that parse are cached, so a malformed reply is retried on the
+    next call instead of being replayed.
+    """
+    key = _classifier_cache_key(name, prompt)
+    result = _classifier_cache_get(key)
+    if result is not None:
+        return result
+
+    response = client.chat.completions.create(
+        model=CLASSIFIER_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ],
+        response_format=response_format,
+        max_tokens=max_tokens,
+        temperature=0,
+    )
+
+    reply = response.choices[0].message.content.strip()
+    result = _parse_boolean_reply(reply, *_schema_keys(response_format))
+    _classifier_cache_put(key, result)
+    return result
+
+
+async def _aclassifier_reply(
+    name: str,
+    prompt: str,
+    system_prompt: str,
+    response_format: dict,
+    max_tokens: int = CLASSIFIER_MAX_TOKENS,
+) -> dict:
+    """
+    Async variant of _classifier_reply(), sharing the same cache.
+    """
+    key = _classifier_cache_key(name, prompt)
+    result = _classifier_cache_get(key)
+    if result is not None:
+        return result
+
+    response = await aclient.chat.completions.create(
+        model=CLASSIFIER_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ],
+        response_format=response_format,
+        max_tokens=max_tokens,
+        temperature=0,
+    )
+
+    reply = response.choices[0].message.content.strip()
+    result = _parse_boolean_reply(reply, *_schema_keys(response_format))
+    _classifier_cache_put(key, result)
+    return result
+
+
+GREET_PROMPT_TMPL = """請你向學生發出一個邀請，鼓勵佢哋參加今日嘅英語練習時間。
 
         Sample: 
-        "Hello {student_name}～👋
+        "Hello <Student Name>～👋
         今日我準備咗一個好輕鬆又實用嘅英文小練習😎
         🧡你準備好一齊挑戰今日嘅任務未？"
 
@@ -92,200 +311,256 @@ def greet_student(student_name: str) -> str:
         Require the student to reply "vocab" to start the vocab training when they are ready
 
         Make sure there is no space before the first text
+        ---
+        Student Name: {student_name}
         """
-    ).format(student_name=student_name)
-
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
-        messages=[
-            {"role": "system", "content": system_prompt_vocab},
-            {"role": "user", "content": prompt},
-        ],
-    )
-    return response.choices[0].message.content.strip()
 
 
-def evaluate_answer(user_answer: str, correct_answer: str) -> bool:
+async def greet_student(student_name: str) -> str:
     """
-    Return True or False
-    Check whether the user's answer is correct, based on the meaning rather than exact wording.
+    Generate a warm and encouraging greeting message to student
+
+    The message introduces the student to today's training topic and invites the student to reply with "I'm ready"
+    to begin.
 
     Parameters:
-        user_answer (str): student's answer.
-        correct_answer (str): model answer.
+        student_name (str): Student name
 
     Returns:
-        bool: True if the LLM determines the answer is correct, else False.
+        str: Cantonese greeting message generated by the LLM
     """
-    prompt = f"""
+    if student_name in greeting_cache:
+        return greeting_cache[student_name]
+
+    prompt = GREET_PROMPT_TMPL.format(student_name=student_name)
+
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt_vocab},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=SHORT_REPLY_MAX_TOKENS,
+        temperature=SHORT_REPLY_TEMPERATURE,
+    )
+    greeting = response.choices[0].message.content.strip()
+    greeting_cache[student_name] = greeting
+    return greeting
+
+
+EVALUATE_ANSWER_PROMPT_TMPL = """
     你係一位用廣東話教書嘅英文老師
 
     你而家要評估學生對某條問題嘅回答，睇下佢答得啱唔啱。
+    請小心分析語意，再判斷學生答法係咪接近正確。
 
     ✅ 請你只用以下 JSON 格式回覆，不需要其他說明或解釋：
 
     {{
     "is_correct": true/false
     }}
-
-    資料如下：
-
+    ---
     💬 學生答案：
     {user_answer}
 
     📖 標準答案（意思方向）：
     {correct_answer}
-
-    請小心分析語意，再判斷學生答法係咪接近正確。
     """
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
-        messages=[
-            {
-                "role": "system",
-                "content": system_prompt_vocab,
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    reply = response.choices[0].message.content.strip()
 
-    # Parse the JSON-like response
-    try:
-        if '"is_correct": true' in reply.lower():
-            return True
-        elif '"is_correct": false' in reply.lower():
-            return False
-        else:
-            raise ValueError(f"Unexpected LLM response: {reply}")
-    except Exception as e:
-        print(f"⚠️ Failed to interpret LLM response: {reply}")
-        raise e
+EVALUATE_ANSWER_FORMAT = _boolean_schema_format("EvaluateAnswer", "is_correct")
 
 
-def is_student_answering_question(user_reply: str, question_prompt: str) -> bool:
-    """
-    Uses LLM to determine whether the student is attempting to answer the actual question prompt.
+def _evaluate_answer_prompt(user_answer: str, correct_answer: str) -> str:
+    return EVALUATE_ANSWER_PROMPT_TMPL.format(
+        user_answer=user_answer, correct_answer=correct_answer
+    )
 
-    Parameters:
-        user_reply (str): The student's message.
-        question_prompt (str): The question the bot asked (e.g. '你知唔知道 "adapt" 嘅意思？').
 
-    Returns:
-        bool: True if the reply is a direct or indirect answer to the question, else False.
-    """
-    prompt = f"""
-        你問學生：
-        「{question_prompt}」
+def _normalize_answer(text: str) -> str:
+    return re.sub(r"[^\w]+", "", unicodedata.normalize("NFKC", text).lower())
 
-        而學生嘅回應係：
-        「{user_reply}」
 
-        請你首先判斷學生嘅回答係唔係回應緊你問嘅問題？
-
-        你要判斷學生有冇嘗試回應你個問題。
+def _is_obviously_correct(user_answer: str, correct_answer: str) -> bool:
+    """
+    Cheap check for answers that match the model answer after normalization
+    (case, punctuation, whitespace, full-width forms), so no LLM call is needed.
+    """
+    normalized = _normalize_answer(user_answer)
+    return bool(normalized) and normalized == _normalize_answer(correct_answer)
 
-        ✅ 請你當作「有回應」的情況包括：
-        - 學生短答，例如 "適應？"
-        - 用名詞、動詞、形容詞作簡單回答
-        - 答法唔完整，但有明顯意圖想回應問題
-        - 用疑問語氣猜測，例如「係咪意思係…？」
 
-        {{"answered": true}}
+def evaluate_answer(user_answer: str, correct_answer: str) -> bool:
+    """
+    Return True or False
+    Check whether the user's answer is correct, based on the meaning rather than exact wording.
 
-        ❌ 如果學生回應例如：
-        - 問你私人問題
-        - 講笑、講八卦、講無關內容
+    Parameters:
+        user_answer (str): student's answer.
+        correct_answer (str): model answer.
 
-        {{"answered": false}}
+    Returns:
+        bool: True if the LLM determines the answer is correct, else False.
+    """
+    if _is_obviously_correct(user_answer, correct_answer):
+        return True
+
+    result = _classifier_reply(
+        "evaluate_answer",
+        _evaluate_answer_prompt(user_answer, correct_answer),
+        system_prompt_classifier,
+        EVALUATE_ANSWER_FORMAT,
+    )
+    return result["is_correct"]
 
-        請你回覆 JSON 格式：
-        """
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
-        messages=[
-            {"role": "system", "content": system_prompt_reading},
-            {"role": "user", "content": prompt},
-        ],
+async def aevaluate_answer(user_answer: str, correct_answer: str) -> bool:
+    """
+    Async variant of evaluate_answer(), for use with asyncio.gather().
+    """
+    if _is_obviously_correct(user_answer, correct_answer):
+        return True
+
+    result = await _aclassifier_reply(
+        "evaluate_answer",
+        _evaluate_answer_prompt(user_answer, correct_answer),
+        system_prompt_classifier,
+        EVALUATE_ANSWER_FORMAT,
     )
+    return result["is_correct"]
 
-    reply = response.choices[0].message.content.lower()
-    return '"answered": true' in reply
 
-
-def is_reply_relevant_to_learning(user_reply: str, current_question: str) -> bool:
+def batch_evaluate_answers(pairs: list) -> list[bool]:
     """
-    Uses LLM to determine whether the student's message is relevant to the learning task
-    or English learning in general.
+    Grade many answers at once for offline analytics (e.g. re-grading past answers
+    for the teacher dashboard). Not meant for the live chat.
+
+    Answers are graded concurrently on a thread pool with the same fast path and
+    cache as evaluate_answer().
 
     Parameters:
-        user_reply (str): The student's message.
-        current_question (str): The current English learning prompt/question.
+        pairs (list): (user_answer, correct_answer) tuples.
 
     Returns:
-        bool: True if relevant to English learning, else False.
+        list[bool]: One result per pair, in the same order.
     """
-    prompt = f"""
+    with ThreadPoolExecutor(max_workers=BATCH_EVALUATE_WORKERS) as pool:
+        return list(pool.map(lambda pair: evaluate_answer(*pair), pairs))
+
+
+CLASSIFY_REPLY_PROMPT_TMPL = """
     你係一位用廣東話教英文嘅老師。
 
-    學生啱啱回應咗一段訊息，你要判斷佢講嘅內容，係唔係同英文學習關。
+    請你就學生對你問題嘅回應，同時判斷兩樣嘢：
+
+    1. "answering"：學生有冇嘗試回應你個問題？
+    ✅ 短答（例如 "適應？"）、用名詞／動詞／形容詞簡單回答、答法唔完整但有明顯意圖、用疑問語氣猜測 → true
+    ❌ 問你私人問題、講笑、講八卦、講無關內容 → false
+
+    2. "relevant"：學生講嘅內容係唔係同英文學習有關？
+    ✅ 正常回應問題、問英文問題、想學英文 → true
+    ❌ 講其他無關話題（例如：煮飯、AI係咩、天氣、無厘頭）→ false
+
+    e.g.: 想問吓book呢個字可唔可以轉做動詞？ is relevant
+    e.g.: 想問吓英文裏面noun係乜嘢意思？ is relevant
 
-    以下係你問佢嘅問題：
-    「{current_question}」
+    唔需要其他說明，只用以下 JSON 格式回覆：
+    {{"answering": true/false, "relevant": true/false}}
+    ---
+    以下係你問學生嘅問題：
+    「{question}」
 
     以下係學生嘅回應：
     「{user_reply}」
+    """
 
-    請你判斷學生係咪：
-    ✅ 正常回應問題、問英文問題、想學英文 → 回覆：{{"relevant": true}}
-    ❌ 講其他無關話題（例如：煮飯、AI係咩、天氣、無厘頭）→ 回覆：{{"relevant": false}}
 
-    e.g.: 想問吓book呢個字可唔可以轉做動詞？ is relevant
-    e.g.: 想問吓英文裏面noun係乜嘢意思？ is relevant
+CLASSIFY_REPLY_FORMAT = _boolean_schema_format("ClassifyReply", "answering", "relevant")
 
 
-    唔需要其他說明，只用 JSON 格式回覆。
+def _classify_reply_prompt(user_reply: str, question: str) -> str:
+    return CLASSIFY_REPLY_PROMPT_TMPL.format(question=question, user_reply=user_reply)
+
+
+def classify_reply(user_reply: str, question: str) -> dict:
     """
+    Uses one LLM call to classify whether the student is answering the question and
+    whether the reply is relevant to English learning.
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
-        messages=[
-            {"role": "system", "content": system_prompt_vocab},
-            {"role": "user", "content": prompt},
-        ],
-    )
+    Asking for both labels at once means the question and reply are only sent once.
+
+    Parameters:
+        user_reply (str): The student's message.
+        question (str): The question the bot asked.
 
-    reply = response.choices[0].message.content.lower()
-    return '"relevant": true' in reply
+    Returns:
+        dict: {"answering": bool, "relevant": bool}
+    """
+    return _classifier_reply(
+        "classify_reply",
+        _classify_reply_prompt(user_reply, question),
+        system_prompt_classifier,
+        CLASSIFY_REPLY_FORMAT,
+        max_tokens=CLASSIFY_REPLY_MAX_TOKENS,
+    )
 
 
-def generate_answer_to_student_question(user_question: str) -> str:
+async def aclassify_reply(user_reply: str, question: str) -> dict:
     """
-    Use LLM to generate answer to student's english related question
+    Async variant of classify_reply(), for use with asyncio.gather().
     """
+    return await _aclassifier_reply(
+        "classify_reply",
+        _classify_reply_prompt(user_reply, question),
+        system_prompt_classifier,
+        CLASSIFY_REPLY_FORMAT,
+        max_tokens=CLASSIFY_REPLY_MAX_TOKENS,
+    )
 
-    prompt = f"""
-    學生問咗一條有關英文學習嘅問題，請你用廣東話簡單解答，並引導佢繼續返學習任務。
 
+ANSWER_STUDENT_QUESTION_PROMPT_TMPL = """
+    學生問咗一條有關英文學習嘅問題，請你用廣東話簡單解答，並引導佢繼續返學習任務。
+    ---
     問題：
     「{user_question}」
     """
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+
+async def generate_answer_to_student_question(user_question: str) -> str:
+    """
+    Use LLM to generate answer to student's english related question
+    """
+
+    prompt = ANSWER_STUDENT_QUESTION_PROMPT_TMPL.format(user_question=user_question)
+
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {"role": "system", "content": system_prompt_vocab},
             {"role": "user", "content": prompt},
         ],
+        max_tokens=TEACHING_MAX_TOKENS,
     )
 
     return response.choices[0].message.content.strip()
 
 
-def handle_irrelevant_input_with_llm(user_input: str) -> str:
+IRRELEVANT_INPUT_PROMPT_TMPL = """
+        學生啱啱講咗一啲同學習無關、跳題、或者偏離英文練習嘅說話。
+
+        請你用以下方式回應佢：
+        1. 回應學生
+        2. 再用輕鬆、鼓勵語氣話返佢我哋要返嚟學英文
+        3. 可以加 emoji、輕 humour，但唔好講太長
+
+        Require the student to reply "vocab" to start the vocab training when they are ready
+        ---
+        學生講：
+        「{user_input}」
+        """
+
+
+async def handle_irrelevant_input_with_llm(user_input: str) -> str:
     """
     Uses LLM to politely handle off-topic or irrelevant messages
     and gently redirect the student back to English learning.
@@ -296,32 +571,21 @@ def handle_irrelevant_input_with_llm(user_input: str) -> str:
     Returns:
         str: A warm Cantonese reply that acknowledges and redirects.
     """
-    prompt = f"""
-        學生啱啱講咗一啲同學習無關、跳題、或者偏離英文練習嘅說話：
-
-        學生講：
-        「{user_input}」
-
-        請你用以下方式回應佢：
-        1. 回應學生
-        2. 再用輕鬆、鼓勵語氣話返佢我哋要返嚟學英文
-        3. 可以加 emoji、輕 humour，但唔好講太長
-
-        Require the student to reply "vocab" to start the vocab training when they are ready
-        """
+    prompt = IRRELEVANT_INPUT_PROMPT_TMPL.format(user_input=user_input)
 
     try:
-        response = client.chat.completions.create(
-            model="google/gemma-3-27b-it",
+        response = await aclient.chat.completions.create(
+            model=TEACHER_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt_reading},
                 {"role": "user", "content": prompt},
             ],
+            max_tokens=TEACHING_MAX_TOKENS,
         )
         return response.choices[0].message.content.strip()
 
     except Exception as e:
-        print(f"⚠️ LLM failed in handle_irrelevant_input: {e}")
+        log.warning("⚠️ LLM failed in handle_irrelevant_input: %s", e)
         return "呢個問題好有趣，不過我哋而家專心學英文先啦 😊"
 
 
@@ -332,8 +596,26 @@ READING EXERCISE
 """
 
 
-def generate_question_message(
-    question: str, student_name: str = None, prior_learning: str = None
+QUESTION_MESSAGE_PROMPT_TMPL = """
+        請你設計一段具鼓勵性、結構清晰、具啟發式提問（TalkMoves）、以生活例子支持學習嘅教學開場，內容包括：
+        - 引導性開場白（自然過渡），以下面嘅過渡句開始
+        - 明確學習目標（用學生語言講）
+        - 一條封閉式理解問題（即下面嘅問題）
+        - 引導學生參與、預期反應，並適時插入提示或比較
+        - 生活化例子，幫助學生建構意義
+        ---
+        學生名：{student_name}
+        學生剛剛學咗：{prior_learning}
+        過渡句：{transition}
+        問題： {question}
+        """
+
+
+async def generate_question_message(
+    question: str,
+    student_name: str = None,
+    prior_learning: str = None,
+    phone_number: int = None,
 ) -> str:
     """
     Appends the provided question
@@ -343,11 +625,11 @@ def generate_question_message(
         question (str): The comprehension question.
         student_name (str, optional): Student's name.
         prior_learning (str, optional): A brief mention of what the student just learned (for transition).
+        phone_number (int, optional): If given, the message is streamed to the student while it is generated.
 
     Returns:
         str: A message to send to the student.
     """
-    name_text = f"{student_name}～👋 " if student_name else ""
     prior_learning = f"{prior_learning}" if prior_learning else ""
     transition = (
         f"頭先你做得唔錯，我哋啱啱學咗關於：{prior_learning}。而家我哋再試一條題目，實踐下你啱啱學到嘅技巧。"
@@ -355,29 +637,28 @@ def generate_question_message(
         else "我哋一齊睇下一條題目啦，準備好未？"
     )
 
-    prompt = f"""
-        學生名：{student_name if student_name else ""}
-        學生剛剛學咗：{prior_learning if prior_learning else ""}
-        問題： {question}
-
-        Please start with a transition {transition}
-        請你設計一段具鼓勵性、結構清晰、具啟發式提問（TalkMoves）、以生活例子支持學習嘅教學開場，內容包括：
-        - 引導性開場白（自然過渡）
-        - 明確學習目標（用學生語言講）
-        - 一條封閉式理解問題（Question: {question}）
-        - 引導學生參與、預期反應，並適時插入提示或比較
-        - 生活化例子，幫助學生建構意義
-        """
-
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
-        messages=[
-            {"role": "system", "content": system_prompt_reading},
-            {"role": "user", "content": prompt},
-        ],
+    prompt = QUESTION_MESSAGE_PROMPT_TMPL.format(
+        student_name=student_name or "",
+        prior_learning=prior_learning,
+        question=question,
+        transition=transition,
     )
 
-    encouragement = response.choices[0].message.content.strip()
+    if phone_number is not None:
+        encouragement = await stream_and_send(
+            phone_number, prompt, system_prompt_reading
+        )
+        await asend_whatsapp_message(phone_number, question)
+    else:
+        response = await aclient.chat.completions.create(
+            model=TEACHER_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt_reading},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=TEACHING_MAX_TOKENS,
+        )
+        encouragement = response.choices[0].message.content.strip()
 
     # Combine into final message
     full_message = f"""
@@ -387,12 +668,40 @@ def generate_question_message(
     return full_message.strip()
 
 
-def give_hint_or_explanation(
+HINT_FINAL_TASK_TMPL = """學生已經試咗三次未答啱，請你：
+        - 提供正確答案「{correct_answer}」
+        - 具體講解點解係呢個答案
+        - 用學生可能誤解嘅角度作對比
+        - 最後鼓勵學生再試另一題"""
+
+HINT_PROMPT_TMPL = """
+        你係一位經驗豐富、熟悉Scaffolding、懂得用TalkMoves嘅老師。學生答錯咗下面嘅問題。
+
+        請用下面指定嘅語氣，根據下面嘅教學任務生成回饋。
+
+        訊息應該：
+        - 用廣東話
+        - 有啟發式提問
+        - 可能用生活化例子幫佢理解
+        - 如係第三次錯，要總結學習點並幫助學生理解正確觀念
+        ---
+        語氣：{tone}
+        教學任務：{task}
+
+        文章內容：{passage}
+        問題：{question_text}
+        學生作答：{user_answer}
+        正確答案：{correct_answer}
+        """
+
+
+async def give_hint_or_explanation(
     user_answer: str,
     correct_answer: str,
     question_text: str,
     passage: str,
     attempt: int,
+    phone_number: int = None,
 ) -> str:
     """
     Only call when the answer is incorrect
@@ -403,6 +712,7 @@ def give_hint_or_explanation(
         correct_answer (str): The expected answer.
         question_text (str): The original question.
         attempt (int): Current attempt (1–3)
+        phone_number (int, optional): If given, the message is streamed to the student while it is generated.
 
     Logic:
         Attempt	Bot Response Type	Purpose
@@ -418,11 +728,7 @@ def give_hint_or_explanation(
 
     if attempt == 3:
         tone = "溫柔而清楚"
-        task = f"""學生已經試咗三次未答啱，請你：
-        - 提供正確答案「{correct_answer}」
-        - 具體講解點解係呢個答案
-        - 用學生可能誤解嘅角度作對比
-        - 最後鼓勵學生再試另一題"""
+        task = HINT_FINAL_TASK_TMPL.format(correct_answer=correct_answer)
     elif attempt == 2:
         tone = "進一步鼓勵"
         task = "請唔好提供答案，但指出一個可以引導學生思考嘅關鍵詞或句子，幫佢聚焦理解方向，並鼓勵佢再解釋自己點解會咁諗。"
@@ -430,26 +736,20 @@ def give_hint_or_explanation(
         tone = "輕鬆鼓勵"
         task = "請只提供一個提示，幫助學生再次細閱文章內容，但唔講出答案或者直接線索。可以問一條引導問題令佢再諗諗。"
 
-    prompt = f"""
-        你係一位經驗豐富、熟悉Scaffolding、懂得用TalkMoves嘅老師。學生答錯咗以下問題：
-
-        文章內容：{passage}
-        問題：{question_text}
-        學生作答：{user_answer}
-        正確答案：{correct_answer}
+    prompt = HINT_PROMPT_TMPL.format(
+        passage=passage,
+        question_text=question_text,
+        user_answer=user_answer,
+        correct_answer=correct_answer,
+        tone=tone,
+        task=task,
+    )
 
-        請用「{tone}」語氣，根據以下教學任務生成回饋：
-        {task}
+    if phone_number is not None:
+        return await stream_and_send(phone_number, prompt, system_prompt_reading)
 
-        訊息應該：
-        - 用廣東話
-        - 有啟發式提問
-        - 可能用生活化例子幫佢理解
-        - 如係第三次錯，要總結學習點並幫助學生理解正確觀念
-        """
-
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {
                 "role": "system",
@@ -457,12 +757,97 @@ def give_hint_or_explanation(
             },
             {"role": "user", "content": prompt},
         ],
+        max_tokens=TEACHING_MAX_TOKENS,
     )
 
     return response.choices[0].message.content.strip()
 
 
-def ask_why_correct(question_text: str, user_answer: str, passage: str) -> str:
+WHY_CORRECT_PROMPT_TMPL = """
+        學生啱啱答啱咗一條問題，你想邀請佢講吓佢點解會咁答，鼓勵佢反思自己嘅思考過程。
+        ---
+        問題：{question_text}
+        學生答案：{user_answer}
+        文章：{passage}
+
+        """
+
+
+FINAL_EXPLANATION_DELIMITER = "[[NEXT]]"
+
+FINAL_EXPLANATION_AND_NEXT_PROMPT_TMPL = """
+        你係一位經驗豐富、熟悉Scaffolding、懂得用TalkMoves嘅老師。學生已經試咗三次，都未答啱下面嘅問題。
+
+        請用「溫柔而清楚」語氣，分兩部分回覆：
+
+        第一部分：
+        - 提供正確答案
+        - 具體講解點解係呢個答案
+        - 用學生可能誤解嘅角度作對比
+        - 總結學習點並幫助學生理解正確觀念
+
+        然後單獨一行寫 {delimiter}
+
+        第二部分：自然過渡去下一條題目，鼓勵學生再試：
+        - 明確學習目標（用學生語言講）
+        - 一條封閉式理解問題（即下面嘅下一條題目）
+        - 生活化例子，幫助學生建構意義
+
+        兩部分都要用廣東話，有啟發式提問
+        ---
+        文章內容：{passage}
+        問題：{question_text}
+        學生作答：{user_answer}
+        正確答案：{correct_answer}
+        下一條題目：{next_question}
+        """
+
+
+async def give_final_explanation_and_next(
+    passage: str,
+    question_text: str,
+    correct_answer: str,
+    user_answer: str,
+    next_question: str,
+    phone_number: int,
+) -> str:
+    """
+    Only call on the third incorrect attempt
+    Explains the correct answer and introduces the next question in a single streamed LLM
+    call, instead of give_hint_or_explanation() followed by generate_question_message().
+
+    Parameters:
+        passage (str): The passage content for context.
+        question_text (str): The question the student could not answer.
+        correct_answer (str): The expected answer.
+        user_answer (str): The student's last response.
+        next_question (str): The next comprehension question.
+        phone_number (int): Student's phone number; both parts are streamed to it.
+
+    Returns:
+        str: The explanation and the opening for the next question.
+    """
+    prompt = FINAL_EXPLANATION_AND_NEXT_PROMPT_TMPL.format(
+        passage=passage,
+        question_text=question_text,
+        user_answer=user_answer,
+        correct_answer=correct_answer,
+        delimiter=FINAL_EXPLANATION_DELIMITER,
+        next_question=next_question,
+    )
+
+    reply = await stream_and_send(
+        phone_number,
+        prompt,
+        system_prompt_reading,
+        max_tokens=TEACHING_MAX_TOKENS * 2,
+        section_delimiter=FINAL_EXPLANATION_DELIMITER,
+    )
+    await asend_whatsapp_message(phone_number, next_question)
+    return reply.replace(FINAL_EXPLANATION_DELIMITER, "\n")
+
+
+async def ask_why_correct(question_text: str, user_answer: str, passage: str) -> str:
     """
     Only call when the answer is incorrect
     Asking the student to reflect on why they chose their (correct) answer.
@@ -475,17 +860,12 @@ def ask_why_correct(question_text: str, user_answer: str, passage: str) -> str:
     Returns:
         str: Cantonese prompt asking the student for reflection.
     """
-    prompt = f"""
-        學生啱啱答啱咗一條問題，你想邀請佢講吓佢點解會咁答，鼓勵佢反思自己嘅思考過程。
-
-        問題：{question_text}
-        學生答案：{user_answer}
-        文章：{passage}
-
-        """
+    prompt = WHY_CORRECT_PROMPT_TMPL.format(
+        question_text=question_text, user_answer=user_answer, passage=passage
+    )
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {
                 "role": "system",
@@ -493,12 +873,30 @@ def ask_why_correct(question_text: str, user_answer: str, passage: str) -> str:
             },
             {"role": "user", "content": prompt},
         ],
+        max_tokens=TEACHING_MAX_TOKENS,
     )
 
     return response.choices[0].message.content.strip()
 
 
-def respond_to_reflection(
+REFLECTION_PROMPT_TMPL = """
+        學生啱啱回答咗你之前問佢：「你點解會咁答呢？」依家佢分享咗佢嘅諗法。
+
+        請你根據佢嘅回應：
+        1. 肯定佢願意分享自己嘅想法
+        2. 評價佢嘅解釋
+        3. 如果佢有啲細節未掌握，可以輕輕指出並補充
+
+        最後鼓勵學生準備試下一題
+        ---
+        📝 學生回應：{reflection_text}
+        ❓ 原問題：{question_text}
+        ✅ 標準答案：{correct_answer}
+        📖 文章：{passage}
+        """
+
+
+async def respond_to_reflection(
     reflection_text: str, question_text: str, correct_answer: str, passage: str
 ) -> str:
     """
@@ -514,24 +912,15 @@ def respond_to_reflection(
     Returns:
         str: A warm Cantonese reply affirming and engaging with the student’s reasoning.
     """
-    prompt = f"""
-        學生啱啱回答咗你之前問佢：「你點解會咁答呢？」依家佢分享咗佢嘅諗法。
-
-        請你根據佢嘅回應：
-        1. 肯定佢願意分享自己嘅想法
-        2. 評價佢嘅解釋
-        3. 如果佢有啲細節未掌握，可以輕輕指出並補充
-
-        📝 學生回應：{reflection_text}
-        ❓ 原問題：{question_text}
-        ✅ 標準答案：{correct_answer}
-        📖 文章：{passage}
-
-        最後鼓勵學生準備試下一題
-        """
+    prompt = REFLECTION_PROMPT_TMPL.format(
+        reflection_text=reflection_text,
+        question_text=question_text,
+        correct_answer=correct_answer,
+        passage=passage,
+    )
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {
                 "role": "system",
@@ -539,12 +928,25 @@ def respond_to_reflection(
             },
             {"role": "user", "content": prompt},
         ],
+        max_tokens=TEACHING_MAX_TOKENS,
     )
 
     return response.choices[0].message.content.strip()
 
 
-def ask_open_question(question: str):
+OPEN_QUESTION_PROMPT_TMPL = """
+        請你幫我將下面一條英文開放式問題翻譯成自然、親切、廣東話口語版本，語氣溫柔唔壓力、適合中學生。
+
+        請只回應以下格式：
+
+        <英文問題原文>
+        翻譯內容
+        ---
+        {question}
+        """
+
+
+async def ask_open_question(question: str):
     """
     Uses LLM to return an English open-ended question followed by its warm, short Cantonese translation.
 
@@ -554,25 +956,40 @@ def ask_open_question(question: str):
     Returns:
         str: English question + natural Cantonese translation.
     """
-    prompt = f"""
-        請你幫我將下面一條英文開放式問題翻譯成自然、親切、廣東話口語版本，語氣溫柔唔壓力、適合中學生。
-
-        請只回應以下格式：
-
-        {question}
-        翻譯內容
-        """
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+    prompt = OPEN_QUESTION_PROMPT_TMPL.format(question=question)
+    response = await aclient.chat.completions.create(
+        model=CLASSIFIER_MODEL,
         messages=[
             {"role": "system", "content": system_prompt_open},
             {"role": "user", "content": prompt},
         ],
+        max_tokens=SHORT_REPLY_MAX_TOKENS,
+        temperature=SHORT_REPLY_TEMPERATURE,
     )
     return response.choices[0].message.content.strip()
 
 
-def respond_to_open_answer(
+OPEN_ANSWER_PROMPT_TMPL = """
+        你係一位用廣東話教閱讀理解嘅老師，目標係幫助學生深入思考文章內容，提升分析能力。
+
+        學生啱啱對下面嘅問題作出咗一個自由式回答。
+
+        請你回應佢：
+        1. 肯定佢嘅觀點（可以稱讚佢觀察力、情感連結、或有意思嘅比喻）
+        2. 引用一句佢講過嘅句子，表示你有認真聆聽
+        3. 然後溫柔咁提出你想引導佢思考嘅「學習重點」（即下面嘅教學重點）
+        4. 最後可以輕輕引入參考答案作補充
+
+        請你用自然廣東話，語氣要親切
+        ---
+        📝 問題：{question_text}
+        💬 學生回應：{user_answer}
+        Model Answer: {answer}
+        🎯 教學重點：{learning_objectives}
+        """
+
+
+async def respond_to_open_answer(
     user_answer: str, question_text: str, learning_objectives: str, answer: str
 ) -> str:
     """
@@ -588,36 +1005,26 @@ def respond_to_open_answer(
     Returns:
         str: A warm, dialogic Cantonese response.
     """
-    prompt = f"""
-        你係一位用廣東話教閱讀理解嘅老師，目標係幫助學生深入思考文章內容，提升分析能力。
-
-        學生啱啱對以下問題作出咗一個自由式回答：
-        📝 問題：{question_text}
-        💬 學生回應：{user_answer}
-        Model Answer: {answer}
-
-        請你回應佢：
-        1. 肯定佢嘅觀點（可以稱讚佢觀察力、情感連結、或有意思嘅比喻）
-        2. 引用一句佢講過嘅句子，表示你有認真聆聽
-        3. 然後溫柔咁提出你想引導佢思考嘅「學習重點」：
-        🎯 教學重點：{learning_objectives}
-        4. 最後可以輕輕引入參考答案作補充：
-
-        請你用自然廣東話，語氣要親切
-        """
+    prompt = OPEN_ANSWER_PROMPT_TMPL.format(
+        question_text=question_text,
+        user_answer=user_answer,
+        answer=answer,
+        learning_objectives=learning_objectives,
+    )
 
     try:
-        response = client.chat.completions.create(
-            model="google/gemma-3-27b-it",
+        response = await aclient.chat.completions.create(
+            model=TEACHER_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt_open},
                 {"role": "user", "content": prompt},
             ],
+            max_tokens=TEACHING_MAX_TOKENS,
         )
         return response.choices[0].message.content.strip()
 
     except Exception as e:
-        print(f"⚠️ LLM error in respond_to_open_answer: {e}")
+        log.warning("⚠️ LLM error in respond_to_open_answer: %s", e)
         return "多謝你嘅分享，我哋而家一齊望一望今日嘅學習重點啦～😊"
 
 
@@ -628,31 +1035,20 @@ VOCAB EXERCISE
 """
 
 
-def ask_vocab_meaning_question(vocab_row: dict) -> str:
-    """
-    Generate message asking the student if they know the meaning of a vocabulary word.
-
-    Parameters:
-        vocab_row (dict): A single vocab record (from the vocab sheet).
-
-    Returns:
-        str: Cantonese prompt asking if the student knows the word meaning.
-    """
-    vocab = vocab_row["Vocabulary"]
-    part_of_speech = vocab_row.get("PartOfSpeech", "").lower()
-    part_of_speech_phrase = {
-        "noun": "呢個名詞",
-        "verb": "呢個動詞",
-        "adjective": "呢個形容詞",
-    }.get(part_of_speech, "呢個字")
+# Cantonese phrase used to introduce each part of speech
+_POS_ZH = {
+    "noun": "呢個名詞",
+    "verb": "呢個動詞",
+    "adjective": "呢個形容詞",
+}
 
-    prompt = f"""
+VOCAB_MEANING_PROMPT_TMPL = """
         你係一位以廣東話教英文閱讀嘅AI老師，教學法係以 Dialogic Education 為基礎。
 
         你而家嘅任務係：**直接鼓勵學生估下某個英文生字嘅意思**。
 
-        請你問學生：
-        『{vocab}』{part_of_speech_phrase}，你覺得佢大約咩意思呀？試吓估下。
+        請你用以下句式問學生：
+        『<生字>』<詞性>，你覺得佢大約咩意思呀？試吓估下。
 
         **注意事項：**
         - 唔准講「Hello」、「大家好」、「你好」等等無謂招呼語
@@ -661,10 +1057,32 @@ def ask_vocab_meaning_question(vocab_row: dict) -> str:
         - 句式要自然、貼地，好似真老師咁
 
         你只需要出一條問題，目的是令學生開口，睇吓佢有幾多推測能力。
+        ---
+        生字：{vocab}
+        詞性：{part_of_speech_phrase}
         """
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+
+async def ask_vocab_meaning_question(vocab_row: dict) -> str:
+    """
+    Generate message asking the student if they know the meaning of a vocabulary word.
+
+    Parameters:
+        vocab_row (dict): A single vocab record (from the vocab sheet).
+
+    Returns:
+        str: Cantonese prompt asking if the student knows the word meaning.
+    """
+    vocab = vocab_row["Vocabulary"]
+    part_of_speech = vocab_row.get("PartOfSpeech", "").lower()
+    part_of_speech_phrase = _POS_ZH.get(part_of_speech, "呢個字")
+
+    prompt = VOCAB_MEANING_PROMPT_TMPL.format(
+        vocab=vocab, part_of_speech_phrase=part_of_speech_phrase
+    )
+
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {
                 "role": "system",
@@ -672,12 +1090,29 @@ def ask_vocab_meaning_question(vocab_row: dict) -> str:
             },
             {"role": "user", "content": prompt},
         ],
+        max_tokens=SHORT_REPLY_MAX_TOKENS,
+        temperature=SHORT_REPLY_TEMPERATURE,
     )
 
     return response.choices[0].message.content.strip()
 
 
-def give_vocab_correct_reply(vocab_row: dict) -> str:
+VOCAB_CORRECT_PROMPT_TMPL = """
+        學生啱啱成功回答咗下面呢個生字嘅意思。
+
+        請你肯定學生答啱咗，並用下面嘅意思、例句同記憶法教導學生
+
+        Keep it simple
+        不需要要求學生造句
+        ---
+        生字：“{vocab}”（{part_of_speech}）
+        意思: 「{meaning_zh}」
+        例句：「{example}」
+        記憶法：「{mem_story}」
+        """
+
+
+async def give_vocab_correct_reply(vocab_row: dict) -> str:
     """
     Generate a Cantonese message that praises the student
     for answering a vocabulary word correctly and reinforces the meaning.
@@ -695,20 +1130,16 @@ def give_vocab_correct_reply(vocab_row: dict) -> str:
     root = vocab_row["Roots"]
     mem_story = vocab_row["MemStories"]
 
-    prompt = f"""
-        學生啱啱成功回答咗 “{vocab}” 呢個 {part_of_speech} 嘅意思。
-
-        請你肯定學生答啱咗，並教導學生
-        意思: {meaning_zh}」
-        例句：「{example}」
-        記憶法：「{mem_story}」
-
-        Keep it simple
-        不需要要求學生造句
-        """
+    prompt = VOCAB_CORRECT_PROMPT_TMPL.format(
+        vocab=vocab,
+        part_of_speech=part_of_speech,
+        meaning_zh=meaning_zh,
+        example=example,
+        mem_story=mem_story,
+    )
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {
                 "role": "system",
@@ -716,12 +1147,40 @@ def give_vocab_correct_reply(vocab_row: dict) -> str:
             },
             {"role": "user", "content": prompt},
         ],
+        max_tokens=TEACHING_MAX_TOKENS,
     )
 
     return response.choices[0].message.content.strip()
 
 
-def give_vocab_hint_or_explanation(
+VOCAB_HINT_TASK_TMPL = """
+            回應學生的回答{user_answer}
+            不要提供正確答案
+            例句：{example}
+            提示：{tip}
+            Ask Studnet to try again
+            """
+
+VOCAB_EXPLANATION_TASK_TMPL = """
+            請你提供正確答案「{meaning_zh}」
+            記憶故事：「{mem_story}」
+            詞根：{root}
+            簡短點
+            """
+
+VOCAB_HINT_PROMPT_TMPL = """
+        學生學緊下面呢個生字，但未掌握意思。
+        請你用下面指定嘅語氣，完成下面嘅教學任務。
+        Keep it simple
+        不需要要求學生造句
+        ---
+        生字：“{vocab}”（{part_of_speech}）
+        語氣：{tone}
+        教學任務：{task}
+        """
+
+
+async def give_vocab_hint_or_explanation(
     vocab_row: dict, user_answer: str, attempt: int
 ) -> str:
     """
@@ -748,31 +1207,21 @@ def give_vocab_hint_or_explanation(
 
     if attempt == 1:
         tone = "輕鬆鼓勵"
-        task = f"""
-            回應學生的回答{user_answer}
-            不要提供正確答案
-            例句：{example}
-            提示：{tip}
-            Ask Studnet to try again
-            """
+        task = VOCAB_HINT_TASK_TMPL.format(
+            user_answer=user_answer, example=example, tip=tip
+        )
     else:
         tone = "溫柔而清楚"
-        task = f"""
-            請你提供正確答案「{meaning_zh}」
-            記憶故事：「{mem_story}」
-            詞根：{root}
-            簡短點
-            """
+        task = VOCAB_EXPLANATION_TASK_TMPL.format(
+            meaning_zh=meaning_zh, mem_story=mem_story, root=root
+        )
 
-    prompt = f"""
-        學生學緊 “{vocab}” 呢個 {part_of_speech}，但未掌握意思。
-        請你用{tone}語氣，{task} 。
-        Keep it simple
-        不需要要求學生造句
-        """
+    prompt = VOCAB_HINT_PROMPT_TMPL.format(
+        vocab=vocab, part_of_speech=part_of_speech, tone=tone, task=task
+    )
 
-    response = client.chat.completions.create(
-        model="google/gemma-3-27b-it",
+    response = await aclient.chat.completions.create(
+        model=TEACHER_MODEL,
         messages=[
             {
                 "role": "system",
@@ -780,6 +1229,7 @@ def give_vocab_hint_or_explanation(
             },
             {"role": "user", "content": prompt},
         ],
+        max_tokens=TEACHING_MAX_TOKENS,
     )
-    print("💡Hint!")
+    log.debug("💡Hint!")
     return response.choices[0].message.content.strip()
@@ -1,128 +1,262 @@
+import asyncio
+import logging
+
 from sheet_utils import (
-    get_passage,
-    get_current_question,
-    get_current_answer,
+    get_session_bundle,
     advance_question_progress,
-    get_student_name_by_phone,
 )
 from llm_utils import (
     generate_question_message,
-    evaluate_answer,
+    aevaluate_answer,
     give_hint_or_explanation,
+    give_final_explanation_and_next,
     ask_why_correct,
     handle_irrelevant_input_with_llm,
     respond_to_reflection,
-    is_student_answering_question,
-    is_reply_relevant_to_learning,
+    aclassify_reply,
     generate_answer_to_student_question,
 )
-from whatsapp_utils import send_whatsapp_message
+from session_utils import session_locks
+from whatsapp_utils import asend_whatsapp_message
+
+log = logging.getLogger(__name__)
 
 reading_sessions = {}
 
 
-def start_reading_session(
-    phone_number: int, sheet_user, sheet_comprehension, prior_learning: str = None
-):
-    passage = get_passage(sheet_user, sheet_comprehension, phone_number)
-    question = get_current_question(sheet_user, sheet_comprehension, phone_number)
-    student_name = get_student_name_by_phone(sheet_user, phone_number)
-    prior_learning = prior_learning if prior_learning else ""
+def _load_question(phone_number: int, sheet_user, sheet_comprehension) -> tuple:
+    bundle = get_session_bundle(sheet_user, sheet_comprehension, phone_number)
+    return (
+        bundle["passage"],
+        bundle["question"],
+        bundle["answer"],
+        bundle["student_name"],
+    )
+
 
-    full_message = generate_question_message(question, student_name, prior_learning)
-    reading_sessions[phone_number] = {
+def _advance_and_load_question(
+    phone_number: int, sheet_user, sheet_comprehension
+) -> tuple:
+    advance_question_progress(sheet_user, phone_number)
+    log.info("Advance to next question")
+    return _load_question(phone_number, sheet_user, sheet_comprehension)
+
+
+def _new_session(passage: str, question: str, correct_answer: str) -> dict:
+    return {
         "passage": passage,
         "question": question,
+        "correct_answer": correct_answer,
         "attempt": 1,
         "mode": "",  # empty or 'reflection'
         "last_user_answer": "",
     }
-    send_whatsapp_message(phone_number, full_message)
 
 
-def handle_reading_reply(
+async def _finish_reading_day(phone_number: int):
+    log.info("No more reading questions today")
+    del reading_sessions[phone_number]
+    await asend_whatsapp_message(
+        phone_number, "🎉 你已經完成哂今日所有閱讀問題啦，做得好叻！"
+    )
+
+
+async def start_reading_session(
+    phone_number: int, sheet_user, sheet_comprehension, prior_learning: str = None
+):
+    async with session_locks[phone_number]:
+        await _start_reading_session(
+            phone_number, sheet_user, sheet_comprehension, prior_learning
+        )
+
+
+async def _start_reading_session(
+    phone_number: int, sheet_user, sheet_comprehension, prior_learning: str = None
+):
+    passage, question, correct_answer, student_name = await asyncio.to_thread(
+        _load_question, phone_number, sheet_user, sheet_comprehension
+    )
+    prior_learning = prior_learning if prior_learning else ""
+
+    reading_sessions[phone_number] = _new_session(passage, question, correct_answer)
+    # Streams the opening to the student sentence by sentence
+    await generate_question_message(
+        question, student_name, prior_learning, phone_number
+    )
+
+
+async def handle_reading_reply(
+    phone_number: int, user_reply: str, sheet_user, sheet_comprehension
+):
+    async with session_locks[phone_number]:
+        await _handle_reading_reply(
+            phone_number, user_reply, sheet_user, sheet_comprehension
+        )
+
+
+async def _handle_reading_reply(
     phone_number: int, user_reply: str, sheet_user, sheet_comprehension
 ):
     if phone_number not in reading_sessions:
-        send_whatsapp_message(phone_number, "請先輸入 'reading' 開始今日閱讀任務 ✍️")
+        await asend_whatsapp_message(
+            phone_number, "請先輸入 'reading' 開始今日閱讀任務 ✍️"
+        )
         return
 
     session = reading_sessions[phone_number]
 
     # 🔁 Reflection mode
     if session.get("mode") == "reflection":
-        print("📥 Handling reflection response...")
+        log.info("📥 Handling reflection response...")
         reflection_reply = user_reply
         question = session["question"]
-        correct_answer = get_current_answer(
-            sheet_user, sheet_comprehension, phone_number
-        )
+        correct_answer = session["correct_answer"]
         passage = session["passage"]
 
-        response = respond_to_reflection(
-            reflection_text=reflection_reply,
-            question_text=question,
-            correct_answer=correct_answer,
-            passage=passage,
+        # ✅ Next question was loaded while the student was writing the reflection
+        try:
+            next_passage, next_question, next_answer, student_name = await session[
+                "next_question_task"
+            ]
+        except ValueError:
+            # No question left for today: reply to the reflection and close the session
+            response = await respond_to_reflection(
+                reflection_text=reflection_reply,
+                question_text=question,
+                correct_answer=correct_answer,
+                passage=passage,
+            )
+            await asend_whatsapp_message(phone_number, response)
+            await _finish_reading_day(phone_number)
+            return
+        except Exception as e:
+            # The failed task would raise again on every later reply, so close
+            # the session and let the student start again from the sheet
+            log.error("❌ Failed to load the next reading question: %s", e)
+            del reading_sessions[phone_number]
+            await asend_whatsapp_message(
+                phone_number,
+                "😵 載入下一條問題嗰陣出咗少少問題，請再輸入 'reading' 繼續 ✍️",
+            )
+            return
+
+        # Generate the reflection reply and the next question's opening together
+        response, next_message = await asyncio.gather(
+            respond_to_reflection(
+                reflection_text=reflection_reply,
+                question_text=question,
+                correct_answer=correct_answer,
+                passage=passage,
+            ),
+            generate_question_message(
+                next_question,
+                student_name,
+                reflection_reply,
+            ),
         )
-        print(f"📥 Sending reflection response")
-        send_whatsapp_message(phone_number, response)
-
-        # ✅ Move to next question
-        advance_question_progress(sheet_user, phone_number)
-        print("Advance to next question")
-        del reading_sessions[phone_number]
-        start_reading_session(
-            phone_number, sheet_user, sheet_comprehension, reflection_reply
+        log.info("📥 Sending reflection response")
+        await asend_whatsapp_message(phone_number, response)
+
+        reading_sessions[phone_number] = _new_session(
+            next_passage, next_question, next_answer
         )
+        await asend_whatsapp_message(phone_number, next_message)
         return
 
     # 🧠 Standard question/answer logic
     passage = session["passage"]
     question = session["question"]
     attempt = session["attempt"]
-    correct_answer = get_current_answer(sheet_user, sheet_comprehension, phone_number)
+    correct_answer = session["correct_answer"]
 
-    if not is_student_answering_question(user_reply, question):
-        print("Not answering the question")
-        if is_reply_relevant_to_learning(user_reply, question):
-            reply = generate_answer_to_student_question(user_reply)
-            send_whatsapp_message(phone_number, reply)
+    # Run the independent classifiers concurrently instead of one after another
+    labels, is_correct = await asyncio.gather(
+        aclassify_reply(user_reply, question),
+        aevaluate_answer(user_reply, correct_answer),
+    )
+
+    if not labels["answering"]:
+        log.info("Not answering the question")
+        if labels["relevant"]:
+            reply = await generate_answer_to_student_question(user_reply)
+            await asend_whatsapp_message(phone_number, reply)
         else:
-            print("Not relevant to learning")
-            response = handle_irrelevant_input_with_llm(user_reply)
-            send_whatsapp_message(phone_number, response)
+            log.info("Not relevant to learning")
+            response = await handle_irrelevant_input_with_llm(user_reply)
+            await asend_whatsapp_message(phone_number, response)
         return
 
-    is_correct = evaluate_answer(user_reply, correct_answer)
-
     if is_correct:
-        print("🎉 Student answered correctly.")
+        log.info("🎉 Student answered correctly.")
 
-        # 🌟 Ask for reflection
-        why_msg = ask_why_correct(question, user_reply, passage)
-        send_whatsapp_message(phone_number, why_msg)
+        # ⏩ Move on and load the next question while the student reflects
+        session["next_question_task"] = asyncio.create_task(
+            asyncio.to_thread(
+                _advance_and_load_question,
+                phone_number,
+                sheet_user,
+                sheet_comprehension,
+            )
+        )
 
+        # The sheet is advancing already, so the next reply must be taken as the
+        # reflection even if asking for it fails
         session["mode"] = "reflection"
         session["last_user_answer"] = user_reply
+
+        # 🌟 Ask for reflection
+        why_msg = await ask_why_correct(question, user_reply, passage)
+        await asend_whatsapp_message(phone_number, why_msg)
         return
 
     else:
         # ❌ Incorrect
-        print("❌ Incorrect")
+        log.info("❌ Incorrect")
         if attempt < 3:
-            hint_msg = give_hint_or_explanation(
-                user_reply, correct_answer, question, passage, attempt
-            )
             session["attempt"] += 1
-            send_whatsapp_message(phone_number, hint_msg)
-            send_whatsapp_message(phone_number, f"❓再試吓回答呢條問題啦：{question}")
+            await give_hint_or_explanation(
+                user_reply,
+                correct_answer,
+                question,
+                passage,
+                attempt,
+                phone_number,
+            )
+            await asend_whatsapp_message(
+                phone_number, f"❓再試吓回答呢條問題啦：{question}"
+            )
 
         else:
-            explanation = give_hint_or_explanation(
-                user_reply, correct_answer, question, passage, attempt=3
+            try:
+                next_passage, next_question, next_answer, _ = await asyncio.to_thread(
+                    _advance_and_load_question,
+                    phone_number,
+                    sheet_user,
+                    sheet_comprehension,
+                )
+            except ValueError:
+                # No question left for today: explain this one and close the session
+                await give_hint_or_explanation(
+                    user_reply,
+                    correct_answer,
+                    question,
+                    passage,
+                    3,
+                    phone_number,
+                )
+                await _finish_reading_day(phone_number)
+                return
+
+            reading_sessions[phone_number] = _new_session(
+                next_passage, next_question, next_answer
+            )
+
+            # Explanation and next question's opening come from one streamed call
+            await give_final_explanation_and_next(
+                passage,
+                question,
+                correct_answer,
+                user_reply,
+                next_question,
+                phone_number,
             )
-            send_whatsapp_message(phone_number, explanation)
-            advance_question_progress(sheet_user, phone_number)
-            del reading_sessions[phone_number]
-            start_reading_session(phone_number, sheet_user, sheet_comprehension)
@@ -0,0 +1,19 @@
+"""
+session_utils.py
+
+Shared state for the session controllers (vocab, reading, open reading).
+
+Key object:
+- session_locks: One asyncio lock per student, so quick successive messages from
+  one student are handled in order while different students are still processed
+  concurrently. The webhook takes it around each message, from routing to reply;
+  the public session starters and reply handlers take it for any other caller.
+  asyncio locks are not reentrant, so code already holding it calls the
+  underscored _start_* / _handle_* functions instead.
+"""
+
+import asyncio
+from collections import defaultdict
+
+# { phone_number: asyncio.Lock }
+session_locks = defaultdict(asyncio.Lock)
@@ -10,10 +10,28 @@ Provides all helper functions for interacting with Google Sheets, including:
 Ensures all data used in sessions is retrieved dynamically and synced across students.
 """
 
+from functools import lru_cache
+import time
+
 from oauth2client.service_account import ServiceAccountCredentials
 import gspread
 import config
 
+# Seconds a worksheet's records are reused before being fetched again.
+# Writes through update_sheet() drop the cache immediately.
+SHEET_CACHE_TTL = 30
+
+# Columns the helpers compare or do arithmetic on; every other cell is kept as
+# the raw string from the sheet
+INT_COLUMNS = (
+    "day_of_training",
+    "question_id",
+    "current_question_number",
+    "current_open_question_number",
+    "current_vocab_number",
+    "Day",
+)
+
 """
 ##############
 General
@@ -21,6 +39,139 @@ General
 """
 
 
+def _to_int(value: str):
+    if not value.strip():
+        return 0  # Blank counters (e.g. a new student's row) start from 0
+    try:
+        return int(value)
+    except ValueError:
+        return value  # Non-numeric cells are left as they are
+
+
+class CachedSheet:
+    """
+    Wraps a gspread worksheet so its records are downloaded once and reused,
+    instead of every helper re-fetching the whole worksheet.
+
+    The worksheet is read with a single get_all_values() call, which returns the
+    header row together with the data. Cells stay raw strings, except for the
+    INT_COLUMNS, which are converted once per download.
+
+    Lookup indexes are built once per download:
+        by_phone: { "phone_no": 1-based row index (including header) }
+        by_day_qid: { (day_of_training, question_id): row }
+        by_day: { day: [rows for that day, in sheet order] }  (question and vocab sheets)
+
+    The header row comes from the same download. It is kept across
+    invalidations, since writing a cell never moves columns:
+        col_index: { column header name: 1-based column index }
+
+    Any other attribute (update_cell, row_values, ...) is passed through to the
+    wrapped worksheet.
+    """
+
+    def __init__(self, sheet, ttl: float = SHEET_CACHE_TTL):
+        self.sheet = sheet
+        self.ttl = ttl
+        self._records = None
+        self._loaded_at = 0.0
+        self._by_phone = {}
+        self._by_day_qid = {}
+        self._by_day = {}
+        self._col_index = None
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+    def records(self) -> list:
+        """
+        Returns the worksheet's records, fetching them only when the cache is
+        empty or older than the TTL.
+        """
+        if self._records is None or time.monotonic() - self._loaded_at > self.ttl:
+            self._load()
+        return self._records
+
+    @property
+    def by_phone(self) -> dict:
+        self.records()
+        return self._by_phone
+
+    @property
+    def by_day_qid(self) -> dict:
+        self.records()
+        return self._by_day_qid
+
+    @property
+    def by_day(self) -> dict:
+        self.records()
+        return self._by_day
+
+    @property
+    def col_index(self) -> dict:
+        if self._col_index is None:
+            self.records()
+        return self._col_index
+
+    def _load(self) -> None:
+        values = self.sheet.get_all_values()
+        headers = values[0] if values else []
+        int_columns = [name for name in INT_COLUMNS if name in headers]
+        records = []
+        for values_row in values[1:]:
+            row = dict(zip(headers, values_row))
+            for name in int_columns:
+                row[name] = _to_int(row[name])
+            records.append(row)
+
+        by_phone = {}
+        by_day_qid = {}
+        by_day = {}
+        for i, row in enumerate(records, start=2):  # Row 1 is the header
+            if "phone_no" in row:
+                by_phone.setdefault(str(row["phone_no"]), i)
+            if "day_of_training" in row and "question_id" in row:
+                by_day_qid.setdefault((row["day_of_training"], row["question_id"]), row)
+                by_day.setdefault(row["day_of_training"], []).append(row)
+            elif "Day" in row:  # Vocab sheet
+                by_day.setdefault(row["Day"], []).append(row)
+
+        self._by_phone = by_phone
+        self._by_day_qid = by_day_qid
+        self._by_day = by_day
+        self._col_index = {name: i for i, name in enumerate(headers, start=1)}
+        self._records = records
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        # Drops the data only; col_index stays valid after writes
+        self._records = None
+
+
+@lru_cache(maxsize=1)
+def get_client() -> gspread.Client:
+    """
+    Returns the authorized gspread client, shared by every worksheet so the
+    service-account credentials are only exchanged once.
+    """
+    scope = [
+        "https://spreadsheets.google.com/feeds",
+        "https://www.googleapis.com/auth/drive",
+    ]
+    creds = ServiceAccountCredentials.from_json_keyfile_name(
+        config.GOOGLE_SHEETS_CREDENTIAL_PATH, scope
+    )
+    return gspread.authorize(creds)
+
+
+@lru_cache(maxsize=None)
+def get_spreadsheet(sheet_name: str) -> gspread.Spreadsheet:
+    """
+    Returns the opened spreadsheet, reused for every worksheet in it.
+    """
+    return get_client().open(sheet_name)
+
+
 def connect_to_sheet(sheet_name: str, worksheet_title: str):
     """
     Connects to a specific Google Sheet.
@@ -34,7 +185,7 @@ def connect_to_sheet(sheet_name: str, worksheet_title: str):
         worksheet_title (str): The title of the specific worksheet/tab.
 
     Returns:
-        gspread.models.Worksheet: A gspread worksheet object that can be used to read/write data.
+        CachedSheet: The gspread worksheet wrapped in a record cache, used to read/write data.
 
     Raises:
         ValueError: If the sheet name or worksheet title is not found.
@@ -42,18 +193,9 @@ def connect_to_sheet(sheet_name: str, worksheet_title: str):
     Troubleshoot:
         Please check if the sheet is shared with the cred.json email e.g. growtalk-bot@your-project.iam.gserviceaccount.com
     """
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(
-        config.GOOGLE_SHEETS_CREDENTIAL_PATH, scope
-    )
-    client = gspread.authorize(creds)
-
     try:
-        sheet = client.open(sheet_name).worksheet(worksheet_title)
-        return sheet
+        sheet = get_spreadsheet(sheet_name).worksheet(worksheet_title)
+        return CachedSheet(sheet)
     except gspread.exceptions.SpreadsheetNotFound:
         raise ValueError(
             f"❌ Spreadsheet '{sheet_name}' not found. Please check the name or sharing settings."
@@ -64,6 +206,13 @@ def connect_to_sheet(sheet_name: str, worksheet_title: str):
         )
 
 
+def _column_index(sheet, column: str) -> int:
+    col_index = sheet.col_index.get(column)
+    if col_index is None:
+        raise ValueError(f"Column '{column}' not found in sheet.")
+    return col_index
+
+
 def update_sheet(sheet, phone_number: int, column: str, data: any) -> None:
     """
     Updates a specific cell in the given Google Sheet, based on the phone number.
@@ -78,14 +227,34 @@ def update_sheet(sheet, phone_number: int, column: str, data: any) -> None:
         None
     """
     row_index = get_row_index_by_phone(sheet, phone_number)
-
-    headers = sheet.row_values(1)
-    try:
-        col_index = headers.index(column) + 1
-    except ValueError:
-        raise ValueError(f"Column '{column}' not found in sheet.")
+    col_index = _column_index(sheet, column)
 
     sheet.update_cell(row_index, col_index, data)
+    sheet.invalidate()
+
+
+def batch_update_sheet(sheet, phone_number: int, updates: dict) -> None:
+    """
+    Updates several cells in the user's row with a single request.
+
+    Parameters:
+        sheet (gspread.Worksheet): The worksheet object to update.
+        phone_number (int): The phone number to locate the row.
+        updates (dict): { column header name: value to write }
+
+    Returns:
+        None
+    """
+    row_index = get_row_index_by_phone(sheet, phone_number)
+
+    cells = [
+        gspread.Cell(row_index, _column_index(sheet, column), value)
+        for column, value in updates.items()
+    ]
+
+    # Same value parsing as update_cell(), so numbers stay numbers in the sheet
+    sheet.update_cells(cells, value_input_option="USER_ENTERED")
+    sheet.invalidate()
 
 
 def get_row_index_by_phone(sheet, phone_number: int) -> int:
@@ -99,11 +268,37 @@ def get_row_index_by_phone(sheet, phone_number: int) -> int:
     Returns:
         int: The 1-based row index.
     """
-    data = sheet.get_all_records()
-    for i, row in enumerate(data, start=2):  # Start from row 2 to account for header
-        if str(row.get("phone_no")) == str(phone_number):
-            return i
-    raise ValueError(f"Phone number {phone_number} not found in sheet.")
+    # Rows can be inserted or sorted in the sheet at any time, so the row is
+    # located on the server right before a write rather than taken from the
+    # cache; find() returns one cell instead of the whole sheet
+    cell = sheet.find(str(phone_number), in_column=_column_index(sheet, "phone_no"))
+    if cell is None:
+        raise ValueError(f"Phone number {phone_number} not found in sheet.")
+    return cell.row
+
+
+def get_user_record(sheet_user, phone_number: int) -> dict:
+    """
+    Returns the user's row from the cached user sheet records.
+
+    Parameters:
+        sheet_user (gspread.Worksheet): The worksheet containing user data.
+        phone_number (int): The student's phone number.
+
+    Returns:
+        dict: The student's row, keyed by column header.
+    """
+    row_index = sheet_user.by_phone.get(str(phone_number))
+    if row_index is None:
+        raise ValueError(f"Phone number {phone_number} not found in sheet.")
+    return sheet_user.records()[row_index - 2]  # Row 2 is records[0]
+
+
+def is_registered_student(sheet_user, phone_number: int) -> bool:
+    """
+    Returns True if the phone number has a row in the user sheet.
+    """
+    return str(phone_number) in sheet_user.by_phone
 
 
 def get_student_name_by_phone(sheet_user, phone_number: int) -> str:
@@ -120,12 +315,11 @@ def get_student_name_by_phone(sheet_user, phone_number: int) -> str:
     Raises:
         ValueError: If the student is not found.
     """
-    records = sheet_user.get_all_records()
-    for row in records:
-        if str(row.get("phone_no")) == str(phone_number):
-            return row.get("eng_name")
+    row_index = sheet_user.by_phone.get(str(phone_number))
+    if row_index is None:
+        raise ValueError(f"❌ Student with phone number {phone_number} not found.")
 
-    raise ValueError(f"❌ Student with phone number {phone_number} not found.")
+    return sheet_user.records()[row_index - 2].get("eng_name")
 
 
 def advance_day_of_training(sheet_user, phone_number: int) -> None:
@@ -140,8 +334,7 @@ def advance_day_of_training(sheet_user, phone_number: int) -> None:
         None
     """
     # Locate the studnet
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    data = sheet_user.get_all_records()[row_index - 2]
+    data = get_user_record(sheet_user, phone_number)
 
     current_number = data.get("day_of_training")
     if current_number is None:
@@ -149,14 +342,16 @@ def advance_day_of_training(sheet_user, phone_number: int) -> None:
 
     new_number = current_number + 1
 
-    # Use your existing update function
-    update_sheet(sheet_user, phone_number, column="day_of_training", data=new_number)
-    update_sheet(
-        sheet_user, phone_number, column="current_question_number", data=1
-    )  # Reset current_question_number to 1
-    update_sheet(
-        sheet_user, phone_number, column="current_vocab_number", data=0
-    )  # Reset current_question_number to 0
+    # Move to the next day and reset the question and vocab progress in one write
+    batch_update_sheet(
+        sheet_user,
+        phone_number,
+        {
+            "day_of_training": new_number,
+            "current_question_number": 1,
+            "current_vocab_number": 0,
+        },
+    )
 
 
 """
@@ -166,36 +361,29 @@ READING EXERCISE
 """
 
 
-def get_passage(sheet_user, sheet_comprehension, phone_number: int) -> str:
+def _lookup(
+    sheet_user, sheet_questions, phone_number: int, progress_column: str, error: str
+) -> dict:
     """
-    Returns the passage for the training day
-
-    Parameters:
-        sheet_user (gspread.Worksheet): User sheet
-        sheet_comprehension (gspread.Worksheet): Comprehension sheet
-        phone_number (int): Student's phone number
+    Returns the question row for the student's training day and their current
+    question number in progress_column, found through the (day, question_id) index.
 
-    Returns:
-        str: Passage text
+    Raises:
+        ValueError: With the given error message if there is no such row.
     """
-    # Locate student
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
+    user_data = get_user_record(sheet_user, phone_number)
+    key = (user_data["day_of_training"], user_data[progress_column])
 
-    # Identify what is they day of training of the student
-    day = user_data["day_of_training"]
-
-    records = sheet_comprehension.get_all_records()
-    for row in records:
-        if row["day_of_training"] == day:
-            return row["passage_text"]
+    row = sheet_questions.by_day_qid.get(key)
+    if row is None:
+        raise ValueError(error)
+    return row
 
-    raise ValueError(f"No passage found for Day {day}")
 
-
-def get_current_question(sheet_user, sheet_comprehension, phone_number: int) -> str:
+def get_session_bundle(sheet_user, sheet_comprehension, phone_number: int) -> dict:
     """
-    To retrieve a Question
+    Retrieves everything needed to start a reading question in one read per worksheet,
+    instead of re-reading the user sheet for every field.
 
     Parameters:
         sheet_user (gspread.Worksheet): User sheet
@@ -203,48 +391,28 @@ def get_current_question(sheet_user, sheet_comprehension, phone_number: int) ->
         phone_number (int): Student's phone number
 
     Returns:
-        str: The corresponding value (question or answer text)
+        dict: {"passage", "question", "answer", "student_name"}
     """
-    # Locate student
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
+    user_data = get_user_record(sheet_user, phone_number)
 
     day = user_data["day_of_training"]
     q_num = user_data["current_question_number"]
 
-    records = sheet_comprehension.get_all_records()
-    for row in records:
-        if row["day_of_training"] == day and row["question_id"] == q_num:
-            return row["question_text"]
+    day_rows = sheet_comprehension.by_day.get(day)
+    if not day_rows:
+        raise ValueError(f"No passage found for Day {day}")
+    passage = day_rows[0]["passage_text"]
 
-    raise ValueError(f"Cannot find question")
+    question_row = sheet_comprehension.by_day_qid.get((day, q_num))
+    if question_row is None:
+        raise ValueError("Cannot find question")
 
-
-def get_current_answer(sheet_user, sheet_comprehension, phone_number: int) -> str:
-    """
-    To retrieve a comprehension Answer
-
-    Parameters:
-        sheet_user (gspread.Worksheet): User sheet
-        sheet_comprehension (gspread.Worksheet): Comprehension sheet
-        phone_number (int): Student's phone number
-
-    Returns:
-        str: The corresponding value answer text
-    """
-    # Locate student
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
-
-    day = user_data["day_of_training"]
-    q_num = user_data["current_question_number"]
-
-    records = sheet_comprehension.get_all_records()
-    for row in records:
-        if row["day_of_training"] == day and row["question_id"] == q_num:
-            return row["answer_text"]
-
-    raise ValueError(f"Cannot find question")
+    return {
+        "passage": passage,
+        "question": question_row["question_text"],
+        "answer": question_row["answer_text"],
+        "student_name": user_data.get("eng_name"),
+    }
 
 
 def advance_question_progress(sheet_user, phone_number: int) -> None:
@@ -259,10 +427,7 @@ def advance_question_progress(sheet_user, phone_number: int) -> None:
         None
     """
     # Locate the row
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    data = sheet_user.get_all_records()[
-        row_index - 2
-    ]  # Adjust for header (row 2 = index 0)
+    data = get_user_record(sheet_user, phone_number)
 
     current_number = data.get("current_question_number")
     if current_number is None:
@@ -276,51 +441,10 @@ def advance_question_progress(sheet_user, phone_number: int) -> None:
     )
 
 
-def get_open_question(sheet_user, sheet_open_reading, phone_number: int) -> str:
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
-    day = user_data["day_of_training"]
-    q_num = user_data["current_open_question_number"]
-
-    records = sheet_open_reading.get_all_records()
-    for row in records:
-        if row["day_of_training"] == day and row["question_id"] == q_num:
-            return row["question_text"]
-
-    raise ValueError("Cannot find open-ended question")
-
-
-def get_open_question_objective(
-    sheet_user, sheet_open_reading, phone_number: int
-) -> str:
-    """
-    Retrieves the learning objective for the current open-ended question.
-
-    Parameters:
-        sheet_user: Google Sheet for user progress
-        sheet_open_reading: Google Sheet for open-ended questions
-        phone_number: Student's phone number
-
-    Returns:
-        str: Learning objective associated with the current question
-    """
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
-
-    day = user_data["day_of_training"]
-    q_num = user_data["current_open_question_number"]
-
-    records = sheet_open_reading.get_all_records()
-    for row in records:
-        if row["day_of_training"] == day and row["question_id"] == q_num:
-            return row.get("learning_objective", "")
-
-    raise ValueError("Cannot find learning objective for current open-ended question.")
-
-
-def get_open_question_ans(sheet_user, sheet_open_reading, phone_number: int) -> str:
+def get_open_question_bundle(sheet_user, sheet_open_reading, phone_number: int) -> dict:
     """
-    Retrieves the answer for the current open-ended question.
+    Retrieves the current open-ended question together with its learning objective
+    and answer, reading each worksheet once.
 
     Parameters:
         sheet_user: Google Sheet for user progress
@@ -328,20 +452,20 @@ def get_open_question_ans(sheet_user, sheet_open_reading, phone_number: int) ->
         phone_number: Student's phone number
 
     Returns:
-        str: Learning objective associated with the current question
+        dict: {"question", "learning_objective", "answer"}
     """
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
-
-    day = user_data["day_of_training"]
-    q_num = user_data["current_open_question_number"]
-
-    records = sheet_open_reading.get_all_records()
-    for row in records:
-        if row["day_of_training"] == day and row["question_id"] == q_num:
-            return row.get("answer_text", "")
-
-    raise ValueError("Cannot find answer for current open-ended question.")
+    row = _lookup(
+        sheet_user,
+        sheet_open_reading,
+        phone_number,
+        "current_open_question_number",
+        "Cannot find open-ended question",
+    )
+    return {
+        "question": row["question_text"],
+        "learning_objective": row.get("learning_objective", ""),
+        "answer": row.get("answer_text", ""),
+    }
 
 
 def advance_open_question_progress(sheet_user, phone_number: int) -> None:
@@ -355,8 +479,7 @@ def advance_open_question_progress(sheet_user, phone_number: int) -> None:
     Returns:
         None
     """
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
+    user_data = get_user_record(sheet_user, phone_number)
 
     current_number = user_data.get("current_open_question_number")
     if current_number is None:
@@ -378,38 +501,24 @@ VOCAB EXERCISE
 """
 
 
-def get_current_vocab_row(sheet_user, sheet_vocab, phone_number: int) -> dict | None:
+def get_vocab_for_day(sheet_vocab, day: int) -> list:
     """
-    Returns the next vocab row for a user based on their day_of_training and current_vocab_index.
-    If no vocab left for the day, returns None.
+    Returns the vocab rows for a training day, in sheet order.
     """
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
-    day = user_data["day_of_training"]
-    vocab_index = user_data.get("current_vocab_number")
-
-    # Filter vocab list by day
-    vocab_data = [v for v in sheet_vocab.get_all_records() if v["Day"] == day]
-
-    # If no more vocab left
-    if vocab_index >= len(vocab_data):
-        return None
-
-    return vocab_data[vocab_index]
+    return sheet_vocab.by_day.get(day, [])
 
 
-def advance_vocab_index(sheet_user, phone_number: int) -> None:
-    row_index = get_row_index_by_phone(sheet_user, phone_number)
-    user_data = sheet_user.get_all_records()[row_index - 2]
-    current_index = user_data.get("current_vocab_number", 0)
-
-    update_sheet(sheet_user, phone_number, "current_vocab_number", current_index + 1)
-
+def get_day_vocab(sheet_user, sheet_vocab, phone_number: int) -> tuple:
+    """
+    Returns the user's training day, the vocab rows for that day and their
+    current_vocab_number, so a session can step through the list without
+    re-reading the sheets.
 
-"""
-TEST
-"""
+    Returns:
+        tuple: (day, list of vocab rows for the day, current vocab index)
+    """
+    user_data = get_user_record(sheet_user, phone_number)
+    day = user_data["day_of_training"]
+    vocab_index = user_data.get("current_vocab_number", 0)
 
-user_sheet = connect_to_sheet("User List", "Sheet1")
-reading_sheet = connect_to_sheet("Question List", "reading_close_end")
-vocab_sheet = connect_to_sheet("Question List", "vocab")
+    return day, get_vocab_for_day(sheet_vocab, day), vocab_index
@@ -10,38 +10,146 @@ Orchestrates the entire conversational vocabulary training session:
 One session controller manages the full flow of one vocab word at a time per student.
 """
 
-from sheet_utils import get_current_vocab_row, advance_vocab_index
+import asyncio
+import json
+import logging
+
+import redis.asyncio as redis
+
+import config
+from sheet_utils import get_day_vocab, get_vocab_for_day, update_sheet
 from llm_utils import (
     ask_vocab_meaning_question,
     give_vocab_correct_reply,
     give_vocab_hint_or_explanation,
-    evaluate_answer,
+    aevaluate_answer,
 )
-from whatsapp_utils import send_whatsapp_message
+from session_utils import session_locks
+from whatsapp_utils import asend_whatsapp_message
 
+log = logging.getLogger(__name__)
+
+# Sessions are kept in this process: { phone_number: {"day": int, "cursor": int, "attempt": int} }
+# The vocab row itself is looked up again from the cached vocab sheet.
+# Reading sessions and last_sent_messages are per-process too, so run one worker.
 vocab_sessions = {}
 
+# Each session is also copied to Redis (vocab:{phone_number}), so a restart does not
+# drop a student's progress mid-word. Redis is optional: while it is unreachable,
+# sessions just don't survive a restart.
+redis_client = redis.from_url(config.REDIS_URL, decode_responses=True)
+VOCAB_SESSION_TTL = 24 * 60 * 60  # seconds
+
+# Next word's question being generated in this worker: { phone_number: (day, cursor, task) }
+_next_questions = {}
+
+
+def _session_key(phone_number) -> str:
+    return f"vocab:{phone_number}"
+
+
+async def _load_session(phone_number) -> dict | None:
+    if phone_number in vocab_sessions:
+        return vocab_sessions[phone_number]
+
+    # Not seen since this process started: pick up a session saved before a restart
+    try:
+        raw = await redis_client.get(_session_key(phone_number))
+    except redis.RedisError as e:
+        log.warning("⚠️ Redis unavailable, vocab session not restored: %s", e)
+        return None
+    if not raw:
+        return None
+    vocab_sessions[phone_number] = json.loads(raw)
+    return vocab_sessions[phone_number]
+
+
+async def _save_session(phone_number, session: dict) -> None:
+    vocab_sessions[phone_number] = session
+    try:
+        await redis_client.set(
+            _session_key(phone_number), json.dumps(session), ex=VOCAB_SESSION_TTL
+        )
+    except redis.RedisError as e:
+        log.warning("⚠️ Redis unavailable, vocab session not persisted: %s", e)
+
+
+async def _delete_session(phone_number) -> None:
+    vocab_sessions.pop(phone_number, None)
+    try:
+        await redis_client.delete(_session_key(phone_number))
+    except redis.RedisError as e:
+        log.warning("⚠️ Redis unavailable, vocab session not deleted: %s", e)
 
-def start_vocab_session(phone_number, sheet_user, sheet_vocab):
-    vocab_row = get_current_vocab_row(sheet_user, sheet_vocab, phone_number)
 
-    if vocab_row is None:
-        send_whatsapp_message(
+async def start_vocab_session(phone_number, sheet_user, sheet_vocab):
+    async with session_locks[phone_number]:
+        await _start_vocab_session(phone_number, sheet_user, sheet_vocab)
+
+
+async def _start_vocab_session(phone_number, sheet_user, sheet_vocab):
+    day, day_vocab, vocab_index = await asyncio.to_thread(
+        get_day_vocab, sheet_user, sheet_vocab, phone_number
+    )
+    session = {"day": day, "cursor": vocab_index}
+    await _ask_current_vocab(phone_number, session, day_vocab)
+
+
+async def _ask_current_vocab(phone_number, session: dict, day_vocab: list):
+    prefetched = _next_questions.pop(phone_number, None)
+
+    if session["cursor"] >= len(day_vocab):
+        await _delete_session(phone_number)
+        await asend_whatsapp_message(
             phone_number,
             "🎉 你已經完成哂今日所有生字啦，做得好叻！輸入 'warm up' 開始今日既 Reading Warm-up Exercise 啦~",
         )
         return
 
-    message = ask_vocab_meaning_question(vocab_row)
-    vocab_sessions[phone_number] = {"attempt": 1, "last_vocab": vocab_row}
-    send_whatsapp_message(phone_number, f"{message}")
+    vocab_row = day_vocab[session["cursor"]]
+    if prefetched is not None and prefetched[:2] == (session["day"], session["cursor"]):
+        message = await prefetched[2]
+    else:
+        message = await ask_vocab_meaning_question(vocab_row)
+    session["attempt"] = 1
+    await _save_session(phone_number, session)
+    await asend_whatsapp_message(phone_number, f"{message}")
+
+
+def _preload_next_vocab(phone_number, session: dict, day_vocab: list):
+    # Start writing the next word's question now, so it is ready once the
+    # current reply has been sent
+    if session["cursor"] < len(day_vocab):
+        next_row = day_vocab[session["cursor"]]
+        _next_questions[phone_number] = (
+            session["day"],
+            session["cursor"],
+            asyncio.create_task(ask_vocab_meaning_question(next_row)),
+        )
+
+
+async def _advance_vocab(phone_number, session: dict, day_vocab: list, sheet_user):
+    session["cursor"] += 1
+    _preload_next_vocab(phone_number, session, day_vocab)
+    await asyncio.to_thread(
+        update_sheet,
+        sheet_user,
+        phone_number,
+        "current_vocab_number",
+        session["cursor"],
+    )
 
 
-def handle_vocab_reply(phone_number, user_reply, sheet_user, sheet_vocab):
-    session = vocab_sessions.get(phone_number)
+async def handle_vocab_reply(phone_number, user_reply, sheet_user, sheet_vocab):
+    async with session_locks[phone_number]:
+        await _handle_vocab_reply(phone_number, user_reply, sheet_user, sheet_vocab)
+
+
+async def _handle_vocab_reply(phone_number, user_reply, sheet_user, sheet_vocab):
+    session = await _load_session(phone_number)
 
     if not session:
-        send_whatsapp_message(
+        await asend_whatsapp_message(
             phone_number,
             f"""各位同學今朝俾咗大家幾個生字，唔知道大家記得幾多呢？無論你學咗幾多都唔緊要，跟住落嚟我哋一齊去背呢幾隻生字啦！
             
@@ -49,26 +157,30 @@ def handle_vocab_reply(phone_number, user_reply, sheet_user, sheet_vocab):
         )
         return
 
-    vocab_row = session["last_vocab"]
+    day_vocab = await asyncio.to_thread(get_vocab_for_day, sheet_vocab, session["day"])
+    vocab_row = day_vocab[session["cursor"]]
     correct_answer = vocab_row["ChineseExplaination"]
     attempt = session["attempt"]
 
-    is_correct = evaluate_answer(user_reply, correct_answer)
+    is_correct = await aevaluate_answer(user_reply, correct_answer)
 
     if is_correct:
-        msg = give_vocab_correct_reply(vocab_row)
-        send_whatsapp_message(phone_number, msg)
-        advance_vocab_index(sheet_user, phone_number)
-        del vocab_sessions[phone_number]
-        start_vocab_session(phone_number, sheet_user, sheet_vocab)
+        msg, _ = await asyncio.gather(
+            give_vocab_correct_reply(vocab_row),
+            _advance_vocab(phone_number, session, day_vocab, sheet_user),
+        )
+        await asend_whatsapp_message(phone_number, msg)
+        await _ask_current_vocab(phone_number, session, day_vocab)
     else:
         if attempt == 1:
-            msg = give_vocab_hint_or_explanation(vocab_row, user_reply, attempt=1)
-            vocab_sessions[phone_number]["attempt"] = 2
-            send_whatsapp_message(phone_number, msg)
+            msg = await give_vocab_hint_or_explanation(vocab_row, user_reply, attempt=1)
+            session["attempt"] = 2
+            await _save_session(phone_number, session)
+            await asend_whatsapp_message(phone_number, msg)
         else:
-            msg = give_vocab_hint_or_explanation(vocab_row, user_reply, attempt=2)
-            advance_vocab_index(sheet_user, phone_number)
-            del vocab_sessions[phone_number]
-            send_whatsapp_message(phone_number, msg)
-            start_vocab_session(phone_number, sheet_user, sheet_vocab)
+            msg, _ = await asyncio.gather(
+                give_vocab_hint_or_explanation(vocab_row, user_reply, attempt=2),
+                _advance_vocab(phone_number, session, day_vocab, sheet_user),
+            )
+            await asend_whatsapp_message(phone_number, msg)
+            await _ask_current_vocab(phone_number, session, day_vocab)
@@ -10,9 +10,26 @@ Key function:
 This module decouples message sending from core session logic and allows clean external triggering.
 """
 
+import logging
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
 
 WHATSAPP_API_URL = "http://localhost:3000/send-message"
+WHATSAPP_TIMEOUT = 5  # seconds
+
+# Keep-alive session, so sends reuse pooled connections to the Node.js bot
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Async client for the coroutine handlers, so sends don't block the event loop
+_aclient = httpx.AsyncClient(
+    timeout=WHATSAPP_TIMEOUT,
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+)
 
 
 # Memory store for last sent message: { phone_number: "last_question_text" }
@@ -34,17 +51,44 @@ def send_whatsapp_message(phone_number: int, message: str) -> bool:
         # Store the last sent message before sending
         last_sent_messages[phone_number] = message
 
-        response = requests.post(
+        response = _session.post(
+            WHATSAPP_API_URL,
+            json={"phone_number": str(phone_number), "message": message},
+            timeout=WHATSAPP_TIMEOUT,
+        )
+
+        if response.status_code == 200:
+            log.debug("✅ Message sent successfully!")
+            return True
+        else:
+            log.error("❌ Failed to send: %s", response.json())
+            return False
+    except Exception as e:
+        log.error("❌ Error: %s", e)
+        return False
+
+
+async def asend_whatsapp_message(phone_number: int, message: str) -> bool:
+    """
+    Async variant of send_whatsapp_message(), for the coroutine handlers.
+
+    The sync version is kept for callers outside the event loop.
+    """
+    try:
+        # Store the last sent message before sending
+        last_sent_messages[phone_number] = message
+
+        response = await _aclient.post(
             WHATSAPP_API_URL,
             json={"phone_number": str(phone_number), "message": message},
         )
 
         if response.status_code == 200:
-            print("✅ Message sent successfully!")
+            log.debug("✅ Message sent successfully!")
             return True
         else:
-            print("❌ Failed to send:", response.json())
+            log.error("❌ Failed to send: %s", response.json())
             return False
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error("❌ Error: %s", e)
         return False
@@ -19,104 +19,210 @@ This serves as the bridge from WhatsApp to Python.
 # cd whatsapp bot
 # node .\index.js
 
-from fastapi import FastAPI, Request
+import asyncio
+import logging
+import logging.handlers
+import queue
+import re
+
+from fastapi import BackgroundTasks, FastAPI, Request
 import uvicorn
 from llm_utils import (
+    aclassify_reply,
     generate_answer_to_student_question,
     greet_student,
     handle_irrelevant_input_with_llm,
-    is_reply_relevant_to_learning,
-    is_student_answering_question,
 )
-from sheet_utils import connect_to_sheet, get_student_name_by_phone
+from sheet_utils import (
+    connect_to_sheet,
+    get_student_name_by_phone,
+    is_registered_student,
+)
+from session_utils import session_locks
 from vocab_session_controller import (
-    start_vocab_session,
-    handle_vocab_reply,
-    vocab_sessions,
+    _start_vocab_session,
+    _handle_vocab_reply,
 )
-from whatsapp_utils import send_whatsapp_message, last_sent_messages
+from whatsapp_utils import asend_whatsapp_message, last_sent_messages
 from reading_session_controller import (
-    start_reading_session,
-    handle_reading_reply,
+    _start_reading_session,
+    _handle_reading_reply,
     reading_sessions,
 )
 from open_reading_session_controller import (
-    start_open_reading_session,
-    handle_open_reading_reply,
+    _start_open_reading_session,
+    _handle_open_reading_reply,
     open_reading_sessions,
 )
 
 
 app = FastAPI()
 
-user_sheet = connect_to_sheet("User List", "Sheet1")
-open_reading_sheet = connect_to_sheet(
-    "Copy of ielts文本素材1標準化文本_v1", "Part 2-Open-End Que"
-)
-close_reading_sheet = connect_to_sheet(
-    "Copy of ielts文本素材1標準化文本_v1", "Part 3-Closed-End Que"
-)
+log = logging.getLogger(__name__)
+
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Sends all log records through a queue, so handlers writing to stdout run on the
+    listener thread instead of blocking the event loop.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    return listener
+
+
+log_listener = setup_logging()
+
+
+@app.on_event("shutdown")
+def stop_logging():
+    # Flush any queued log records before the process exits
+    log_listener.stop()
+
+
+# Worksheets are opened once at startup, not at import
+user_sheet = None
+open_reading_sheet = None
+close_reading_sheet = None
+vocab_sheet = None
+
+
+@app.on_event("startup")
+def open_sheets():
+    global user_sheet, open_reading_sheet, close_reading_sheet, vocab_sheet
+
+    user_sheet = connect_to_sheet("User List", "Sheet1")
+    open_reading_sheet = connect_to_sheet(
+        "Copy of ielts文本素材1標準化文本_v1", "Part 2-Open-End Que"
+    )
+    close_reading_sheet = connect_to_sheet(
+        "Copy of ielts文本素材1標準化文本_v1", "Part 3-Closed-End Que"
+    )
+
+    vocab_sheet = connect_to_sheet("Question List", "vocab")
 
-vocab_sheet = connect_to_sheet("Question List", "vocab")
+
+async def _do_greet(phone_number):
+    log.info("💬 Greeting student...")
+    student_name = await asyncio.to_thread(
+        get_student_name_by_phone, user_sheet, phone_number
+    )
+    greet = await greet_student(student_name)
+    await asend_whatsapp_message(phone_number, greet)
+
+
+async def _do_vocab(phone_number):
+    log.info("🧠 Starting vocab session...")
+    await _start_vocab_session(phone_number, user_sheet, vocab_sheet)
+
+
+async def _do_reading(phone_number):
+    log.info("📘 Starting reading session...")
+    await _start_reading_session(phone_number, user_sheet, close_reading_sheet)
+
+
+async def _do_warmup(phone_number):
+    log.info("🪞 Starting open-ended reading session...")
+    await _start_open_reading_session(phone_number, user_sheet, open_reading_sheet)
+
+
+# Commands are matched as a whole word at the start of the message, so words
+# inside an answer (e.g. "reading" in "warm up reading") or longer words
+# (e.g. "vocabulary") don't trigger the wrong session
+COMMANDS = {
+    "start": _do_greet,
+    "vocab": _do_vocab,
+    "reading": _do_reading,
+    "warm up": _do_warmup,
+}
+
+
+def _match_command(message: str):
+    for command, handler in COMMANDS.items():
+        if re.match(rf"{re.escape(command)}\b", message):
+            return handler
+    return None
 
 
 @app.post("/receive-whatsapp")
-async def receive_message(request: Request):
+async def receive_message(request: Request, background_tasks: BackgroundTasks):
     data = await request.json()
     phone_number = data["phone_number"]
     message = data["message"].strip().lower()
-    student_name = get_student_name_by_phone(user_sheet, phone_number)
 
-    print(f"📥 Received message from {phone_number}: {message}")
+    log.info("📥 Received message from %s: %s", phone_number, message)
 
-    # 1. Command-based triggers
-    if "start" in message:
-        print("💬 Greeting student...")
-        greet = greet_student(student_name)
-        send_whatsapp_message(phone_number, greet)
-        return
+    # Reply to the bot straight away; sheet reads, LLM calls and WhatsApp
+    # replies all happen after the response has been sent
+    background_tasks.add_task(process_message, phone_number, message)
 
-    elif "vocab" in message:
-        print("🧠 Starting vocab session...")
-        start_vocab_session(phone_number, user_sheet, vocab_sheet)
-        return
 
-    elif "reading" in message:
-        print("📘 Starting reading session...")
-        start_reading_session(phone_number, user_sheet, close_reading_sheet)
+async def process_message(phone_number, message: str):
+    # Only students in the user sheet get a reply, so messages from any other
+    # contact never reach the LLM
+    if not await asyncio.to_thread(is_registered_student, user_sheet, phone_number):
+        log.info("🚫 Ignoring message from unregistered number %s", phone_number)
         return
 
-    elif "warm up" in message:
-        print("🪞 Starting open-ended reading session...")
-        start_open_reading_session(phone_number, user_sheet, open_reading_sheet)
+    # Routing depends on the student's session state, so a reply that arrives
+    # while a session is still being set up waits for it instead of being
+    # routed as if there were no session
+    async with session_locks[phone_number]:
+        await _process_message(phone_number, message)
+
+
+async def _process_message(phone_number, message: str):
+    # 1. Command-based triggers
+    command = _match_command(message)
+    if command is not None:
+        await command(phone_number)
         return
 
     # 2. Ongoing session check
     elif phone_number in open_reading_sessions:
-        handle_open_reading_reply(phone_number, message, user_sheet, open_reading_sheet)
+        await _handle_open_reading_reply(
+            phone_number, message, user_sheet, open_reading_sheet
+        )
         return
 
     elif phone_number in reading_sessions:
-        handle_reading_reply(phone_number, message, user_sheet, close_reading_sheet)
+        await _handle_reading_reply(
+            phone_number, message, user_sheet, close_reading_sheet
+        )
         return
 
     # 3. Default fallback: check if they are answering previous vocab question
     question_prompt = last_sent_messages.get(phone_number, "")
 
-    if is_student_answering_question(message, question_prompt):
-        print("💡 Student is trying to answer a question.")
-        handle_vocab_reply(phone_number, message, user_sheet, vocab_sheet)
+    labels = await aclassify_reply(message, question_prompt)
+
+    if labels["answering"]:
+        log.info("💡 Student is trying to answer a question.")
+        await _handle_vocab_reply(phone_number, message, user_sheet, vocab_sheet)
         return
 
-    elif is_reply_relevant_to_learning(message, question_prompt):
-        print("💬 Related to English, but not answering.")
-        response = generate_answer_to_student_question(message)
-        send_whatsapp_message(phone_number, response)
-        start_vocab_session(phone_number, user_sheet, vocab_sheet)
+    elif labels["relevant"]:
+        log.info("💬 Related to English, but not answering.")
+        response = await generate_answer_to_student_question(message)
+        await asend_whatsapp_message(phone_number, response)
+        await _start_vocab_session(phone_number, user_sheet, vocab_sheet)
         return
 
     else:
-        print("⛔️ Irrelevant input. Redirecting.")
-        response = handle_irrelevant_input_with_llm(message)
-        send_whatsapp_message(phone_number, response)
+        log.info("⛔️ Irrelevant input. Redirecting.")
+        response = await handle_irrelevant_input_with_llm(message)
+        await asend_whatsapp_message(phone_number, response)
         return